@@ -1,11 +1,24 @@
 import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pacsv
+import pyarrow.feather as feather
+import pyarrow.parquet as pq
+import glob
+import logging
 import os
+import sys
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
 
 # Definición de rutas absolutas basadas en la ubicación del script
 # Esto establece las ubicaciones de los datos crudos y del Data Warehouse (DW)
 BASE_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 SOURCE_DATA_DIR = os.path.join(BASE_PATH, 'raw')
 TARGET_DW_DIR = os.path.join(BASE_PATH, 'dw')
+# Caché local (Feather) de las fuentes ya parseadas
+CACHE_DIR = os.path.join(BASE_PATH, '.cache')
 
 # Lista de fuentes (archivos .csv) a procesar
 CSV_SOURCES = [
@@ -24,11 +37,315 @@ CSV_SOURCES = [
     'web_session'
 ]
 
+# Columnas que consume la fase de Transformación para cada fuente.
+# Las fuentes no listadas se leen completas; el resto de las columnas nunca se decodifica.
+SOURCE_COLUMNS = {
+    'nps_response': ['nps_id', 'customer_id', 'channel_id', 'score', 'responded_at'],
+    'shipment': ['shipment_id', 'order_id', 'carrier', 'tracking_number', 'shipped_at', 'delivered_at'],
+}
+
+# Esquema declarado de cada fuente: PyArrow convierte cada columna directamente
+# al tipo indicado, sin pasada de inferencia de tipos.
+# - Las claves foráneas opcionales se declaran como enteros: con nulos pandas las
+#   recibe como float64 (NaN), igual que con pd.read_csv.
+# - Las claves que en origen vienen como decimales (ej: '2910.0') se declaran float64.
+# - Las fechas de eventos (hechos) se parsean como timestamp en la lectura.
+# - 'created_at' se conserva como texto para no alterar el formato con el que
+#   las dimensiones lo persisten en el DW.
+SCHEMAS = {
+    'address': {
+        'address_id': pa.int64(), 'line1': pa.string(), 'line2': pa.string(),
+        'city': pa.string(), 'province_id': pa.int64(), 'postal_code': pa.int64(),
+        'country_code': pa.string(), 'created_at': pa.string(),
+    },
+    'channel': {
+        'channel_id': pa.int64(), 'code': pa.string(), 'name': pa.string(),
+    },
+    'customer': {
+        'customer_id': pa.int64(), 'email': pa.string(), 'first_name': pa.string(),
+        'last_name': pa.string(), 'phone': pa.string(), 'status': pa.string(),
+        'created_at': pa.string(),
+    },
+    'nps_response': {
+        'nps_id': pa.int64(), 'customer_id': pa.int64(), 'channel_id': pa.int64(),
+        'score': pa.int64(), 'comment': pa.string(), 'responded_at': pa.timestamp('s'),
+    },
+    'payment': {
+        'payment_id': pa.int64(), 'order_id': pa.int64(), 'method': pa.string(),
+        'status': pa.string(), 'amount': pa.float64(), 'paid_at': pa.timestamp('s'),
+        'transaction_ref': pa.string(),
+    },
+    'product': {
+        'product_id': pa.int64(), 'sku': pa.string(), 'name': pa.string(),
+        'category_id': pa.int64(), 'list_price': pa.float64(), 'status': pa.string(),
+        'created_at': pa.string(),
+    },
+    'product_category': {
+        'category_id': pa.int64(), 'name': pa.string(), 'parent_id': pa.int64(),
+    },
+    'province': {
+        'province_id': pa.int64(), 'name': pa.string(), 'code': pa.string(),
+    },
+    'sales_order': {
+        'order_id': pa.int64(), 'customer_id': pa.int64(), 'channel_id': pa.int64(),
+        'store_id': pa.float64(), 'order_date': pa.timestamp('s'),
+        'billing_address_id': pa.float64(), 'shipping_address_id': pa.int64(),
+        'status': pa.string(), 'currency_code': pa.string(), 'subtotal': pa.float64(),
+        'tax_amount': pa.float64(), 'shipping_fee': pa.float64(), 'total_amount': pa.float64(),
+    },
+    'sales_order_item': {
+        'order_item_id': pa.int64(), 'order_id': pa.int64(), 'product_id': pa.int64(),
+        'quantity': pa.int64(), 'unit_price': pa.float64(), 'discount_amount': pa.float64(),
+        'line_total': pa.float64(),
+    },
+    'shipment': {
+        'shipment_id': pa.int64(), 'order_id': pa.int64(), 'carrier': pa.string(),
+        'tracking_number': pa.string(), 'status': pa.string(),
+        'shipped_at': pa.timestamp('s'), 'delivered_at': pa.timestamp('s'),
+    },
+    'store': {
+        'store_id': pa.int64(), 'name': pa.string(), 'address_id': pa.int64(),
+    },
+    'web_session': {
+        'session_id': pa.int64(), 'customer_id': pa.int64(),
+        'started_at': pa.timestamp('s'), 'ended_at': pa.timestamp('s'),
+        'source': pa.string(), 'device': pa.string(),
+    },
+}
+
+# Columnas de texto de baja cardinalidad (estados, códigos, canales, dispositivos).
+# Se leen codificadas como diccionario y llegan a pandas como dtype 'category'.
+CATEGORICAL_COLS = {
+    'address': ['country_code'],
+    'channel': ['code'],
+    'customer': ['status'],
+    'payment': ['method', 'status'],
+    'product': ['status'],
+    'province': ['code'],
+    'sales_order': ['status', 'currency_code'],
+    'shipment': ['carrier'],
+    'web_session': ['source', 'device'],
+}
+
+# Opciones del lector CSV de PyArrow (tokenizador multihilo en C++)
+# Bloques de 64 MB para que cada hilo procese porciones grandes del archivo
+CSV_READ_OPTIONS = pacsv.ReadOptions(use_threads=True, block_size=64 << 20)
+
+# Fuentes CSV de más de LARGE_SOURCE_BYTES (ej: sales_order_item, web_session en
+# producción) se leen como stream de bloques de 32 MB que se parsean en paralelo.
+LARGE_SOURCE_BYTES = 128 << 20
+LARGE_CSV_READ_OPTIONS = pacsv.ReadOptions(use_threads=True, block_size=32 << 20)
+
+def _arrow_string_dtype(arrow_type):
+    """
+    types_mapper para Table.to_pandas: las columnas de texto se mantienen
+    respaldadas por Arrow (un buffer contiguo de UTF-8) en lugar de un objeto
+    Python por celda. El resto de los tipos usa la conversión estándar a NumPy.
+    """
+    if pa.types.is_string(arrow_type) or pa.types.is_large_string(arrow_type):
+        return pd.ArrowDtype(arrow_type)
+    return None
+
+def _csv_convert_options(table_name, columns=None, strict=True):
+    """
+    Construye las opciones de conversión del lector CSV para una fuente.
+    
+    Args:
+        table_name (str): Nombre de la fuente (ej: 'customer').
+        columns (list, optional): Columnas a leer. None lee todas.
+        strict (bool): Si es True se declaran todos los tipos de SCHEMAS. Si es
+            False solo se fijan las columnas de texto y las fechas (también como
+            texto, para que el parseo tolerante de la transformación las convierta,
+            con NaT en los valores inválidos); el resto de los tipos se infiere.
+        
+    Returns:
+        pacsv.ConvertOptions: Tipos declarados (SCHEMAS, CATEGORICAL_COLS) y columnas a incluir.
+    """
+    column_types = dict(SCHEMAS.get(table_name, {}))
+    if not strict:
+        column_types = {
+            col: pa.string() for col, col_type in column_types.items()
+            if pa.types.is_string(col_type) or pa.types.is_timestamp(col_type)
+        }
+    for col in CATEGORICAL_COLS.get(table_name, []):
+        column_types[col] = pa.dictionary(pa.int32(), pa.string())
+    return pacsv.ConvertOptions(
+        column_types=column_types,
+        # Los strings vacíos se interpretan como nulos (NaN), como en pandas.
+        strings_can_be_null=True,
+        include_columns=columns
+    )
+
+def _source_path(source_dir, table_name):
+    """
+    Resuelve el archivo a leer para una fuente: prioriza la versión .parquet
+    (si existe y no es más antigua que el .csv) y, si no, usa el .csv original.
+    
+    Args:
+        source_dir (str): Directorio donde se encuentran los archivos fuente.
+        table_name (str): Nombre de la fuente (ej: 'customer').
+        
+    Returns:
+        str: Ruta completa al archivo a leer.
+    """
+    ruta_csv = os.path.join(source_dir, f"{table_name}.csv")
+    ruta_parquet = os.path.join(source_dir, f"{table_name}.parquet")
+    if os.path.exists(ruta_parquet) and (
+        not os.path.exists(ruta_csv) or os.path.getmtime(ruta_parquet) >= os.path.getmtime(ruta_csv)
+    ):
+        return ruta_parquet
+    return ruta_csv
+
+def _cache_path(ruta_archivo, table_name):
+    """
+    Ruta del archivo de caché (Feather) para una fuente.
+    
+    La clave combina la fecha de modificación del archivo fuente con una huella
+    del esquema y las columnas leídas: si cambia cualquiera de ellos, la
+    entrada anterior deja de ser válida.
+    """
+    firma = repr((
+        ruta_archivo,
+        SCHEMAS.get(table_name),
+        SOURCE_COLUMNS.get(table_name),
+        CATEGORICAL_COLS.get(table_name),
+    ))
+    huella = zlib.crc32(firma.encode('utf-8'))
+    mtime = os.stat(ruta_archivo).st_mtime_ns
+    return os.path.join(CACHE_DIR, f"{table_name}.{mtime}.{huella:08x}.feather")
+
+def _write_cache(tabla, cache_path, table_name):
+    """
+    Guarda una fuente parseada en la caché (Feather, compresión lz4) y elimina
+    las entradas anteriores de la misma fuente. Un fallo de escritura no
+    interrumpe la extracción.
+    """
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        for antigua in glob.glob(os.path.join(CACHE_DIR, f"{table_name}.*.feather")):
+            os.remove(antigua)
+        # Escritura atómica: se escribe a un temporal y luego se renombra
+        tmp_path = f"{cache_path}.tmp"
+        feather.write_feather(tabla, tmp_path, compression='lz4')
+        os.replace(tmp_path, cache_path)
+    except OSError as e:
+        logger.warning("  Advertencia: no se pudo guardar la caché de '%s'. %s", table_name, e)
+
+def _read_arrow_table(ruta_archivo, table_name):
+    """
+    Lee un único archivo fuente (.parquet o .csv) como tabla de Arrow.
+    
+    Solo se leen las columnas de SOURCE_COLUMNS (si la fuente figura allí).
+    """
+    columns = SOURCE_COLUMNS.get(table_name)
+    if ruta_archivo.endswith('.parquet'):
+        # Formato columnar: solo se decodifican las columnas solicitadas
+        return pq.read_table(
+            ruta_archivo,
+            columns=columns,
+            read_dictionary=CATEGORICAL_COLS.get(table_name)
+        )
+    return _read_csv_table(ruta_archivo, table_name, columns)
+
+def _read_csv_table(ruta_archivo, table_name, columns=None):
+    """
+    Lee un archivo fuente .csv como tabla de Arrow con los tipos declarados
+    (SCHEMAS). Si algún valor no los respeta (ej: una fecha con fracción de
+    segundo o zona horaria, un código postal alfanumérico), se vuelve a leer
+    sin los tipos estrictos en lugar de abortar.
+    
+    Args:
+        ruta_archivo (str): Ruta completa al archivo .csv.
+        table_name (str): Nombre de la fuente (ej: 'customer').
+        columns (list, optional): Columnas a leer. None lee todas.
+    """
+    try:
+        return _parse_csv(ruta_archivo, _csv_convert_options(table_name, columns))
+    except pa.ArrowInvalid as e:
+        logger.warning("  Advertencia: '%s' no respeta el esquema declarado; se lee con tipos inferidos. %s",
+                       table_name, e)
+        # Sin streaming: el lector en stream infiere los tipos solo con el primer bloque
+        # (un valor distinto más adelante volvería a fallar); read_csv los reajusta.
+        return _parse_csv(ruta_archivo, _csv_convert_options(table_name, columns, strict=False),
+                          allow_streaming=False)
+
+def _parse_csv(ruta_archivo, convert_options, allow_streaming=True):
+    """
+    Parsea un archivo .csv como tabla de Arrow con las opciones de conversión dadas.
+    
+    Con allow_streaming=True los archivos grandes se leen por bloques con el
+    lector en stream; si no, siempre con read_csv.
+    """
+    # El CSV se mapea en memoria: el lector parsea directamente las páginas del
+    # archivo, sin copiarlo antes a buffers de Python.
+    try:
+        source = pa.memory_map(ruta_archivo, 'r')
+    except OSError:
+        # Fuentes que no admiten mmap (pipes, algunos sistemas de archivos de red)
+        source = pa.OSFile(ruta_archivo, 'r')
+    with source:
+        if allow_streaming and os.path.getsize(ruta_archivo) > LARGE_SOURCE_BYTES:
+            # Archivos grandes: lectura por bloques (RecordBatches) con el lector en stream
+            reader = pacsv.open_csv(
+                source,
+                read_options=LARGE_CSV_READ_OPTIONS,
+                convert_options=convert_options
+            )
+            return pa.Table.from_batches(list(reader), schema=reader.schema)
+        # Se utiliza el lector de CSV de PyArrow
+        return pacsv.read_csv(
+            source,
+            read_options=CSV_READ_OPTIONS,
+            convert_options=convert_options
+        )
+
+def _read_source(ruta_archivo, table_name):
+    """
+    Lee un único archivo fuente (.parquet o .csv) y lo devuelve como DataFrame de pandas.
+    
+    Si la fuente no cambió desde la última ejecución, se lee directamente de la
+    caché Feather (mapeada en memoria) en lugar de volver a parsearla.
+    
+    Args:
+        ruta_archivo (str): Ruta completa al archivo.
+        table_name (str): Nombre de la fuente (ej: 'customer').
+        
+    Returns:
+        pd.DataFrame: Contenido del archivo.
+    """
+    cache_path = _cache_path(ruta_archivo, table_name)
+    if os.path.exists(cache_path):
+        tabla = feather.read_table(cache_path, memory_map=True)
+    else:
+        tabla = _read_arrow_table(ruta_archivo, table_name)
+        _write_cache(tabla, cache_path, table_name)
+    return tabla.to_pandas(self_destruct=True, types_mapper=_arrow_string_dtype)
+
+def convert_sources_to_parquet(source_dir=SOURCE_DATA_DIR):
+    """
+    Migración (única vez): convierte cada fuente .csv a .parquet (compresión snappy)
+    dentro del mismo directorio. A partir de ese momento extract_all_data
+    lee los archivos .parquet en lugar de volver a parsear los .csv.
+    
+    Args:
+        source_dir (str): Directorio donde se encuentran los archivos fuente.
+    """
+    logger.info("Convirtiendo fuentes a Parquet en el path: %s", source_dir)
+    for table_name in CSV_SOURCES:
+        ruta_csv = os.path.join(source_dir, f"{table_name}.csv")
+        # Mismo lector que la extracción (con la relectura tolerante si el esquema no se respeta)
+        tabla = _read_csv_table(ruta_csv, table_name)
+        pq.write_table(tabla, os.path.join(source_dir, f"{table_name}.parquet"), compression='snappy')
+        logger.debug("  -> Fuente '%s' convertida a Parquet.", table_name)
+
 def extract_all_data(source_dir=SOURCE_DATA_DIR):
     """
-    Obtiene y carga todas las fuentes de datos (archivos .csv) desde un 
+    Obtiene y carga todas las fuentes de datos (archivos .parquet o .csv) desde un 
     directorio específico hacia un diccionario de DataFrames de pandas.
     
+    Los archivos se leen en paralelo (un hilo por archivo); el parseo ocurre
+    en código nativo que libera el GIL.
+    
     Args:
         source_dir (str): Directorio donde se encuentran los archivos fuente.
         
@@ -36,26 +353,39 @@ def extract_all_data(source_dir=SOURCE_DATA_DIR):
         dict: Diccionario {nombre_tabla: DataFrame} o None si ocurre un error.
     """
     data_container = {}
-    print(f"Localizando y cargando datos desde el path: {source_dir}")
+    logger.info("Localizando y cargando datos desde el path: %s", source_dir)
     
     try:
-        for table_name in CSV_SOURCES:
-            ruta_archivo = os.path.join(source_dir, f"{table_name}.csv")
-            # Se utiliza la función de lectura de CSV de pandas
-            data_container[table_name] = pd.read_csv(ruta_archivo)
-            print(f"  -> Fuente '{table_name}' integrada correctamente.")
+        max_workers = min(len(CSV_SOURCES), os.cpu_count() or 1)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {
+                table_name: executor.submit(
+                    _read_source,
+                    _source_path(source_dir, table_name),
+                    table_name
+                )
+                for table_name in CSV_SOURCES
+            }
+            # Se recolectan los resultados en el orden de CSV_SOURCES
+            for table_name, future in futures.items():
+                data_container[table_name] = future.result()
+                logger.debug("  -> Fuente '%s' integrada correctamente.", table_name)
             
-        print("Etapa de recolección de datos finalizada.\n")
+        logger.info("Etapa de recolección de datos finalizada.\n")
         return data_container
     
     except FileNotFoundError as e:
-        print(f"Error de acceso: No se localizó el archivo o directorio. {e}")
+        logger.error("Error de acceso: No se localizó el archivo o directorio. %s", e)
         return None
     except Exception as e:
-        print(f"Error inesperado durante la recolección: {e}")
+        logger.error("Error inesperado durante la recolección: %s", e)
         return None
 
 if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    # Migración opcional de las fuentes a Parquet: python -m ETL.extract --to-parquet
+    if '--to-parquet' in sys.argv:
+        convert_sources_to_parquet()
     # Script de verificación para asegurar que el módulo funciona independientemente.
     raw_data = extract_all_data()
     if raw_data:
@@ -1,10 +1,310 @@
 import pandas as pd
+import numpy as np
+import csv
+import pyarrow as pa
+import pyarrow.csv as pacsv
+import functools
+import logging
 import os
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 # La importación relativa funciona porque este módulo se ejecuta
 # como parte del paquete 'ETL' (importado por el orquestador)
 from .extract import TARGET_DW_DIR
 
-def load_to_csv(df_to_save, filename):
+logger = logging.getLogger(__name__)
+
+# El directorio de destino (DW) se crea una única vez, al importar el módulo,
+# y su prefijo se precalcula para no repetir os.path.join en cada guardado.
+os.makedirs(TARGET_DW_DIR, exist_ok=True)
+_TARGET_DW_DIR_SLASH = TARGET_DW_DIR + os.sep
+
+# Formato por defecto de los archivos del DW ('csv', 'parquet' o 'feather').
+# Se puede cambiar con la variable de entorno DW_FORMAT.
+DEFAULT_DW_FORMAT = os.environ.get('DW_FORMAT', 'csv').lower()
+
+# Cantidad de filas que to_csv formatea y escribe por lote (acota el uso de memoria).
+# Se puede ajustar con la variable de entorno DW_CSV_CHUNKSIZE.
+CSV_CHUNKSIZE = int(os.environ.get('DW_CSV_CHUNKSIZE', 65_536))
+
+# Tamaño del buffer de escritura de los CSV (8 MB): menos llamadas write() al sistema
+CSV_BUFFER_SIZE = 8 * 1024 * 1024
+
+# Filas por bloque en la escritura rápida de CSV
+CSV_BLOCK_ROWS = 4096
+
+# load_many guarda las tablas en paralelo (un proceso por tabla).
+# Se desactiva con DW_LOAD_PARALLEL=0.
+LOAD_PARALLEL = os.environ.get('DW_LOAD_PARALLEL', '1') != '0'
+
+# Con menos filas en total que este umbral el arranque de los procesos cuesta más
+# de lo que se gana: se guarda en serie.
+LOAD_PARALLEL_MIN_ROWS = int(os.environ.get('DW_LOAD_PARALLEL_MIN_ROWS', 1_000_000))
+
+# Compresión de los CSV según la extensión del archivo (.csv.gz / .csv.zst).
+# Nivel 1: archivos mucho más chicos a un costo de CPU similar a escribir sin comprimir.
+# mtime=0 hace que el .gz sea reproducible (mismo contenido, mismos bytes).
+CSV_COMPRESSION_BY_EXTENSION = {
+    '.gz': {'method': 'gzip', 'compresslevel': 1, 'mtime': 0},
+    '.zst': {'method': 'zstd', 'level': 1},
+}
+
+def _is_arrow_string(dtype):
+    """Indica si un dtype de pandas es una columna de texto respaldada por Arrow."""
+    if isinstance(dtype, pd.ArrowDtype):
+        return pa.types.is_string(dtype.pyarrow_dtype) or pa.types.is_large_string(dtype.pyarrow_dtype)
+    return isinstance(dtype, pd.StringDtype) and dtype.storage == 'pyarrow'
+
+def _column_format(series):
+    """
+    Devuelve el especificador de formato ('%d', '%r' o '%s') con el que una
+    columna se escribe exactamente igual que con to_csv, o None si la columna
+    requiere el formateador genérico de pandas (nulos, fechas, comillas, etc.).
+    
+    - Enteros NumPy: '%d'.
+    - Float64 NumPy sin NaN: '%r' (repr de Python, igual que pandas: 63636.0).
+      Otros anchos (ej: float32) se dejan a pandas: el repr de float64 de un
+      float32 agrega dígitos (0.10000000149011612 en lugar de 0.1).
+    - Bool NumPy: '%s' (True/False).
+    - Texto (o category de texto) sin nulos ni caracteres que requieran comillas: '%s'.
+    """
+    dtype = series.dtype
+    if isinstance(dtype, np.dtype):
+        if dtype.kind in 'iu':
+            return '%d'
+        if dtype.kind == 'f':
+            return None if dtype != np.float64 or series.isna().any() else '%r'
+        if dtype.kind == 'b':
+            return '%s'
+        return None
+    if isinstance(dtype, pd.CategoricalDtype):
+        # Solo categorías de texto; alcanza con revisar las categorías (pocas)
+        categories = dtype.categories
+        if series.isna().any() or categories.dtype.kind in 'iufcbmM':
+            return None
+        if categories.astype(str).str.contains(r'[,"\r\n]', regex=True).any():
+            return None
+        return '%s'
+    if isinstance(dtype, pd.StringDtype) or _is_arrow_string(dtype):
+        if series.isna().any() or series.str.contains(r'[,"\r\n]', regex=True).any():
+            return None
+        return '%s'
+    return None
+
+def _header_needs_quoting(df):
+    """
+    Indica si algún nombre de columna contiene separadores, comillas o saltos de
+    línea, en cuyo caso to_csv lo escribe entre comillas en el encabezado.
+    """
+    return any(any(ch in str(col) for ch in ',"\r\n') for col in df.columns)
+
+def _row_formats(df):
+    """
+    Especificadores de formato de todas las columnas del DataFrame, o None si
+    alguna columna (o el encabezado) no admite la escritura rápida.
+    """
+    # El encabezado se escribe sin comillas: si algún nombre las requiere, se deja a pandas
+    if _header_needs_quoting(df):
+        return None
+    # Con una sola columna, to_csv entrecomilla los strings vacíos: se deja a pandas
+    if df.shape[1] < 2 and not all(isinstance(dt, np.dtype) for dt in df.dtypes):
+        return None
+    formats = []
+    # Se recorre por posición: con nombres repetidos df[col] devolvería un DataFrame
+    for _, series in df.items():
+        fmt = _column_format(series)
+        if fmt is None:
+            return None
+        formats.append(fmt)
+    return tuple(formats)
+
+@functools.lru_cache(maxsize=None)
+def _compile_row_formatter(formats):
+    """
+    Genera (y compila con exec) una función especializada que formatea una fila
+    (tupla) con los especificadores exactos del esquema de la tabla, por ejemplo:
+    
+        def _format_row(row):
+            return '%d,%d,%r,%s\n' % row
+    
+    Se compila una vez por combinación de tipos y queda en caché.
+    """
+    fmt_str = ','.join(formats) + os.linesep
+    namespace = {}
+    exec(f"def _format_row(row):\n    return {fmt_str!r} % row\n", namespace)
+    return namespace['_format_row']
+
+def _column_values(series):
+    """Valores de una columna en un contenedor que admite slicing y tolist()."""
+    if isinstance(series.dtype, np.dtype):
+        # ndarray.tolist() devuelve escalares de Python (int/float/bool)
+        return series.to_numpy()
+    return series.array
+
+def _write_formatted_csv(df, file_path_full, formats):
+    """
+    Escritura rápida de CSV con el formateador de filas generado para el
+    esquema de la tabla, evitando el formateador genérico de pandas.
+    
+    Las filas se formatean por bloques de CSV_BLOCK_ROWS: cada bloque toma
+    una porción contigua de cada columna, de modo que los datos que se están
+    formateando permanecen en caché y nunca se materializa el archivo completo
+    como texto.
+    """
+    format_row = _compile_row_formatter(formats)
+    arrays = [_column_values(series) for _, series in df.items()]
+    with open(file_path_full, 'wb', buffering=CSV_BUFFER_SIZE) as buf:
+        buf.write((','.join(map(str, df.columns)) + os.linesep).encode('utf-8'))
+        for start in range(0, len(df), CSV_BLOCK_ROWS):
+            block = [arr[start:start + CSV_BLOCK_ROWS].tolist() for arr in arrays]
+            buf.write(''.join(map(format_row, zip(*block))).encode('utf-8'))
+
+def _is_arrow_writable(df):
+    """
+    Indica si un DataFrame puede escribirse con el escritor CSV de Arrow
+    produciendo el mismo texto que to_csv: tiene al menos una columna de texto
+    respaldada por Arrow y el resto son texto, category de texto (se convierten
+    a diccionarios de Arrow) o enteros. Los float, bool y fechas se formatean
+    distinto en Arrow, por lo que quedan excluidos.
+    
+    Con una sola columna, to_csv escribe los vacíos/nulos como "" y Arrow como
+    una línea en blanco (que los lectores de CSV descartan): se deja a pandas.
+    """
+    if df.shape[1] < 2:
+        return False
+    has_arrow_strings = False
+    for dtype in df.dtypes:
+        if _is_arrow_string(dtype):
+            has_arrow_strings = True
+        elif isinstance(dtype, pd.CategoricalDtype):
+            if dtype.categories.dtype.kind in 'iufcbmM':
+                return False
+        elif not pd.api.types.is_integer_dtype(dtype):
+            return False
+    return has_arrow_strings
+
+def _try_write_arrow_csv(df, file_path_full):
+    """
+    Escribe un DataFrame con pyarrow.csv.write_csv: los buffers UTF-8 de las
+    columnas de texto se copian tal cual, sin codificar celda por celda.
+    
+    Se escribe sin comillas (igual que to_csv cuando ningún valor las requiere).
+    Si algún valor contiene separadores, comillas o saltos de línea, Arrow
+    lanza ArrowInvalid y se devuelve False para que quien llama use to_csv.
+    También se devuelve False si la tabla no se puede convertir o si la versión
+    instalada de pyarrow no admite estas opciones (quoting_header requiere
+    pyarrow >= 22 y lanza TypeError en versiones anteriores).
+    
+    Returns:
+        bool: True si el archivo se escribió completo.
+    """
+    try:
+        tabla = pa.Table.from_pandas(df, preserve_index=False)
+        write_options = pacsv.WriteOptions(
+            include_header=True,
+            quoting_style='none',
+            quoting_header='none',
+            eol=os.linesep
+        )
+        with open(file_path_full, 'wb', buffering=CSV_BUFFER_SIZE) as buf:
+            pacsv.write_csv(tabla, buf, write_options=write_options)
+    except (pa.ArrowException, TypeError, ValueError):
+        return False
+    return True
+
+def load_to_parquet(df_to_save, filename):
+    """
+    Persiste un DataFrame a un archivo .parquet (columnar, compresión snappy)
+    dentro del directorio del Data Warehouse (DW).
+    
+    Args:
+        df_to_save (pd.DataFrame): DataFrame a guardar.
+        filename (str): Nombre del archivo de destino (ej: 'dim_customer.parquet').
+    """
+    try:
+        file_path_full = f"{_TARGET_DW_DIR_SLASH}{filename}"
+        
+        df_to_save.to_parquet(file_path_full, compression='snappy', index=False)
+        
+        logger.debug("   -> Persistencia exitosa en: %s", file_path_full)
+        
+    except Exception as e:
+        logger.error("Error al guardar el archivo %s en DW: %s", filename, e)
+
+def load_to_feather(df_to_save, filename):
+    """
+    Persiste un DataFrame a un archivo .feather / .arrow (Arrow IPC, compresión zstd)
+    dentro del directorio del Data Warehouse (DW).
+    
+    Args:
+        df_to_save (pd.DataFrame): DataFrame a guardar.
+        filename (str): Nombre del archivo de destino (ej: 'dim_customer.feather').
+    """
+    try:
+        file_path_full = f"{_TARGET_DW_DIR_SLASH}{filename}"
+        
+        # Feather no admite índices que no sean el RangeIndex por defecto
+        df_to_save.reset_index(drop=True).to_feather(file_path_full, compression='zstd')
+        
+        logger.debug("   -> Persistencia exitosa en: %s", file_path_full)
+        
+    except Exception as e:
+        logger.error("Error al guardar el archivo %s en DW: %s", filename, e)
+
+def _resolve_compression(filename, compression):
+    """
+    Determina la compresión a aplicar: la indicada explícitamente o, si no,
+    la que corresponde a la extensión del archivo. None significa sin compresión.
+    """
+    if compression is not None:
+        return compression
+    for extension, options in CSV_COMPRESSION_BY_EXTENSION.items():
+        if filename.endswith(extension):
+            return options
+    return None
+
+def _is_safe_numpy_dtype(dtype):
+    """Indica si un dtype NumPy se escribe igual con y sin comillas (ver _is_quote_free)."""
+    if not isinstance(dtype, np.dtype):
+        return False
+    return dtype.kind in 'iubMm' or (dtype.kind == 'f' and dtype.itemsize == 8)
+
+def _is_quote_free(df):
+    """
+    Indica si ningún valor del DataFrame puede contener separadores, comillas
+    o saltos de línea; en ese caso to_csv puede escribir con csv.QUOTE_NONE
+    sin cambiar el resultado.
+    
+    Es una lista de tipos permitidos; cualquier otro tipo (object, Interval,
+    struct/diccionarios/binarios de Arrow, Sparse, etc.) se considera inseguro:
+    - Numéricos NumPy (enteros, float64, bool) y fechas/duraciones NumPy.
+    - Texto (StringDtype o texto de Arrow) y category cuyas categorías son
+      texto o de los tipos NumPy anteriores: se revisan los valores.
+    
+    Tampoco es seguro (se mantiene csv.QUOTE_MINIMAL) cuando:
+    - Hay una sola columna: una fila vacía/nula es un registro de un único campo
+      vacío, que to_csv escribe como "" y que con QUOTE_NONE el módulo csv rechaza.
+      Con dos o más columnas una fila vacía se escribe como ',' en ambos modos.
+    - Algún nombre de columna requiere comillas (QUOTE_NONE lo escaparía).
+    - Hay floats NumPy de menos de 64 bits (float32/float16): con QUOTE_NONE
+      pandas los escribe con el repr de float64 (0.10000000149011612 en lugar de 0.1).
+    """
+    if df.shape[1] < 2 or _header_needs_quoting(df):
+        return False
+    for _, series in df.items():
+        dtype = series.dtype
+        if isinstance(dtype, pd.CategoricalDtype):
+            dtype = dtype.categories.dtype
+            series = series.cat.categories.to_series()
+        if _is_safe_numpy_dtype(dtype):
+            continue
+        if not (isinstance(dtype, pd.StringDtype) or _is_arrow_string(dtype)):
+            return False
+        if series.str.contains(r'[,"\\\r\n]', regex=True).any():
+            return False
+    return True
+
+def load_to_csv(df_to_save, filename, compression=None, float_format=None, quoting=None):
     """
     Persiste un DataFrame a un archivo .csv dentro del directorio
     del Data Warehouse (DW).
@@ -12,31 +312,158 @@ def load_to_csv(df_to_save, filename):
     Asegura la compatibilidad con herramientas BI (ej: Power BI)
     forzando el separador decimal a PUNTO (.).
     
+    Si el nombre de archivo termina en .parquet o .feather/.arrow, se delega
+    en load_to_parquet / load_to_feather respectivamente. Los nombres terminados
+    en .gz / .zst generan un CSV comprimido (gzip / zstd, nivel 1).
+    
     Args:
         df_to_save (pd.DataFrame): DataFrame a guardar.
         filename (str): Nombre del archivo de destino (ej: 'dim_customer.csv').
+        compression (str | dict, optional): Compresión a aplicar (formato de
+            pandas.to_csv). Por defecto se infiere de la extensión.
+        float_format (str, optional): Formato de los decimales (ej: '%.6g').
+            Por defecto se conserva la representación completa del valor.
+        quoting (int, optional): Constante del módulo csv. Por defecto se usa
+            csv.QUOTE_NONE cuando ningún texto requiere comillas (evita la
+            lógica de entrecomillado de pandas) y csv.QUOTE_MINIMAL si no.
     """
+    # Un MultiIndex hace que to_csv(index=False) sea extremadamente lento;
+    # como el índice no se persiste, se descarta antes de escribir.
+    if isinstance(df_to_save.index, pd.MultiIndex):
+        df_to_save = df_to_save.reset_index(drop=True)
+    
+    # Formatos columnares: se enrutan según la extensión del archivo
+    if filename.endswith('.parquet'):
+        return load_to_parquet(df_to_save, filename)
+    if filename.endswith(('.feather', '.arrow')):
+        return load_to_feather(df_to_save, filename)
+    
     try:
-        # Se garantiza la existencia del directorio de destino (DW)
-        os.makedirs(TARGET_DW_DIR, exist_ok=True)
+        file_path_full = f"{_TARGET_DW_DIR_SLASH}{filename}"
+        
+        compression = _resolve_compression(filename, compression)
+        # Los caminos rápidos reproducen el formato por defecto de to_csv;
+        # con opciones de formato explícitas se usa siempre pandas.
+        default_format = float_format is None and quoting is None
         
-        file_path_full = os.path.join(TARGET_DW_DIR, filename)
+        # Opciones de to_csv comunes a los archivos comprimidos y sin comprimir
+        csv_options = {
+            'index': False, # No guardar el índice de pandas
+            'decimal': '.', # FORZAR el uso del punto como separador decimal (CRUCIAL para BI)
+            'encoding': 'utf-8', # Estándar de codificación
+            'chunksize': CSV_CHUNKSIZE, # Escritura por lotes de filas
+            'float_format': float_format,
+        }
+        if quoting is None:
+            quoting = csv.QUOTE_NONE if _is_quote_free(df_to_save) else csv.QUOTE_MINIMAL
+        csv_options['quoting'] = quoting
+        if quoting == csv.QUOTE_NONE:
+            csv_options['escapechar'] = '\\'
         
         # Guardado en CSV
-        df_to_save.to_csv(
-            file_path_full, 
-            index=False, # No guardar el índice de pandas
-            decimal='.', # FORZAR el uso del punto como separador decimal (CRUCIAL para BI)
-            encoding='utf-8' # Estándar de codificación
-        )
+        if compression is not None:
+            # CSV comprimido: pandas gestiona el archivo y el compresor
+            df_to_save.to_csv(file_path_full, compression=compression, **csv_options)
+        elif default_format and _is_arrow_writable(df_to_save) and _try_write_arrow_csv(df_to_save, file_path_full):
+            # Tablas con texto respaldado por Arrow: escritor CSV nativo de Arrow
+            pass
+        elif default_format and (formats := _row_formats(df_to_save)) is not None:
+            # Camino rápido: formateador de filas especializado para el esquema
+            _write_formatted_csv(df_to_save, file_path_full, formats)
+        else:
+            # Se escribe a través de un buffer grande (BufferedWriter de 8 MB)
+            with open(file_path_full, 'wb', buffering=CSV_BUFFER_SIZE) as buf:
+                df_to_save.to_csv(buf, **csv_options)
         
-        print(f"   -> Persistencia exitosa en: {file_path_full}")
+        logger.debug("   -> Persistencia exitosa en: %s", file_path_full)
         
     except Exception as e:
-        print(f"Error al guardar el archivo {filename} en DW: {e}")
+        logger.error("Error al guardar el archivo %s en DW: %s", filename, e)
+
+def _to_ipc_bytes(df):
+    """
+    Serializa un DataFrame en formato Arrow IPC (stream) para enviarlo a otro
+    proceso sin pasar por pickle.
+    
+    Returns:
+        bytes | None: El stream IPC, o None si el DataFrame no se reconstruiría
+        idéntico desde Arrow (nombres de columna repetidos, columnas object cuyo
+        tipo Arrow se infiere de los valores, etc.) o no se puede convertir.
+    """
+    if not df.columns.is_unique:
+        return None
+    try:
+        tabla = pa.Table.from_pandas(df, preserve_index=False)
+        # Los tipos que se reconstruirían en el proceso hijo deben coincidir con
+        # los originales (ej: object con enteros y None volvería como float64)
+        restored = tabla.slice(0, 1).to_pandas().dtypes
+        if not all(a == b for a, b in zip(restored, df.dtypes)):
+            return None
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, tabla.schema) as writer:
+            writer.write_table(tabla)
+        return sink.getvalue().to_pybytes()
+    except (pa.ArrowException, TypeError, ValueError):
+        return None
+
+def _load_from_ipc(payload, filename):
+    """
+    Tarea ejecutada en cada proceso de load_many: reconstruye el DataFrame
+    desde Arrow IPC y lo persiste con load_to_csv.
+    """
+    df_to_save = pa.ipc.open_stream(payload).read_all().to_pandas()
+    load_to_csv(df_to_save, filename)
+
+def load_many(tables, file_format=DEFAULT_DW_FORMAT, max_workers=None):
+    """
+    Persiste varias tablas del DW en paralelo (un proceso por tabla).
+    
+    Cada DataFrame se envía al proceso hijo serializado en Arrow IPC y allí
+    se guarda con load_to_csv (que enruta según la extensión del archivo).
+    Las tablas que Arrow no reconstruiría idénticas se envían con pickle.
+    Se guarda en serie si solo hay una tabla o un único núcleo disponible, si
+    el paralelismo está desactivado (LOAD_PARALLEL) o si el total de filas no
+    alcanza LOAD_PARALLEL_MIN_ROWS.
+    
+    Args:
+        tables (dict): Diccionario {nombre_tabla: DataFrame} (ej: {'dim_customer': df}).
+        file_format (str): Extensión de los archivos ('csv', 'parquet' o 'feather').
+        max_workers (int, optional): Cantidad de procesos. Por defecto, uno por núcleo
+            (o uno solo según LOAD_PARALLEL / LOAD_PARALLEL_MIN_ROWS).
+    """
+    if max_workers is None:
+        parallel = LOAD_PARALLEL and sum(len(df) for df in tables.values()) >= LOAD_PARALLEL_MIN_ROWS
+        max_workers = min(len(tables), os.cpu_count() or 1) if parallel else 1
+    
+    if max_workers <= 1:
+        for name, df in tables.items():
+            load_to_csv(df, f"{name}.{file_format}")
+        return
+    
+    # 'spawn' evita heredar por fork el estado del proceso padre (hilos, memoria)
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=max_workers, mp_context=context) as executor:
+        futures = {}
+        for name, df in tables.items():
+            filename = f"{name}.{file_format}"
+            payload = _to_ipc_bytes(df)
+            if payload is not None:
+                futures[name] = executor.submit(_load_from_ipc, payload, filename)
+            else:
+                futures[name] = executor.submit(load_to_csv, df, filename)
+        # Cada tabla es independiente: si falla un proceso, se guarda esa tabla
+        # en el proceso actual y se continúa con las demás
+        for name, future in futures.items():
+            try:
+                future.result()
+            except Exception as e:
+                logger.warning("Advertencia: falló la carga en paralelo de '%s' (%s); se guarda en serie.",
+                               name, e)
+                load_to_csv(tables[name], f"{name}.{file_format}")
 
 if __name__ == '__main__':
     # Script de verificación de carga
+    logging.basicConfig(level=logging.DEBUG, format='%(message)s')
     print("Iniciando verificación de la función de persistencia...")
     # Se utiliza una variable de ruta corregida para este módulo (si se ejecuta solo)
     # NOTA: Para este ejemplo se usaría TARGET_DW_DIR importado
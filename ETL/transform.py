@@ -3,60 +3,332 @@
 # en el proceso ETL. Su objetivo es convertir los datos crudos (tablas relacionales)
 # en un modelo dimensional (Dimensiones y Tablas de Hechos) listo para el Data Warehouse.
 
+import functools
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
 import pandas as pd
 import numpy as np # Importamos numpy por si se usa en alguna operación interna, aunque pandas ya lo incluye.
 
+# Construcción en paralelo (un proceso por tabla) de las dimensiones y de las tablas
+# de hechos, que son independientes entre sí. Se desactiva con DW_TRANSFORM_PARALLEL=0.
+PARALLEL = os.environ.get('DW_TRANSFORM_PARALLEL', '1') != '0'
+
+# Con menos filas crudas que este umbral el arranque de los procesos cuesta más
+# de lo que se gana: se construye en serie.
+PARALLEL_MIN_ROWS = int(os.environ.get('DW_TRANSFORM_PARALLEL_MIN_ROWS', 1_000_000))
+
 # --- Funciones Auxiliares ---
 
+# Columnas de fecha/hora de eventos de las tablas crudas (consumidas por dim_calendar
+# y por las tablas de hechos). Se parsean una única vez en _preparse_dates.
+# Los 'created_at' de las dimensiones no se incluyen: se persisten tal cual (texto).
+EVENT_DATE_COLUMNS = [
+    ('sales_order', 'order_date'),
+    ('web_session', 'started_at'),
+    ('web_session', 'ended_at'),
+    ('nps_response', 'responded_at'),
+    ('payment', 'paid_at'),
+    ('shipment', 'shipped_at'),
+    ('shipment', 'delivered_at'),
+]
+
+# Columnas que determinan el rango de dim_calendar: las fechas de eventos (salvo el
+# fin de sesión web) y los 'created_at' de las dimensiones, que se parsean al vuelo.
+CALENDAR_DATE_COLUMNS = [
+    ('sales_order', 'order_date'),
+    ('web_session', 'started_at'),
+    ('nps_response', 'responded_at'),
+    ('payment', 'paid_at'),
+    ('shipment', 'shipped_at'),
+    ('shipment', 'delivered_at'),
+    ('customer', 'created_at'),
+    ('address', 'created_at'),
+    ('product', 'created_at'),
+]
+
+def _parse_dates(dates):
+    """
+    Función auxiliar que devuelve una serie de fechas como datetime64 sin zona horaria.
+    
+    Las series que ya son datetime64 (ej: tipadas en la extracción) se devuelven
+    tal cual; el resto se parsea con pd.to_datetime (NaT en los valores inválidos).
+    Las fechas con zona horaria (ej: sufijo 'Z') se conservan con su hora local, sin zona.
+    No modifica la serie recibida.
+    """
+    if not pd.api.types.is_datetime64_any_dtype(dates):
+        dates = pd.to_datetime(dates, errors='coerce')
+    if isinstance(dates.dtype, pd.DatetimeTZDtype):
+        dates = dates.dt.tz_localize(None)
+    return dates
+
+def _preparse_dates(data):
+    """
+    Función auxiliar que convierte a datetime64, una única vez y en el mismo
+    diccionario de datos crudos, todas las columnas de EVENT_DATE_COLUMNS
+    (ver _parse_dates). Solo la invoca transform_all_data.
+    
+    Las columnas que ya son datetime64 sin zona no se vuelven a procesar,
+    por lo que la función es idempotente. Las tablas con columnas parseadas se
+    reemplazan en el diccionario por frames nuevos (assign): los DataFrames
+    originales no se modifican.
+    
+    Args:
+        data (dict): Diccionario con los DataFrames de datos crudos (se modifica).
+    """
+    parsed = {}
+    for table, col in EVENT_DATE_COLUMNS:
+        dates = _parse_dates(data[table][col])
+        if dates is not data[table][col]:
+            parsed.setdefault(table, {})[col] = dates
+    for table, columns in parsed.items():
+        data[table] = data[table].assign(**columns)
+
+def _to_arrow_strings(data):
+    """
+    Función auxiliar que convierte, en el mismo diccionario de datos crudos, las
+    columnas de texto 'object' (ej: DataFrames leídos con pd.read_csv en pandas 2.x)
+    a strings respaldados por Arrow ('string[pyarrow]'), el mismo tipo con el que
+    llegan desde la extracción. Comparaciones, joins y escritura quedan así en Arrow.
+    
+    Las columnas numéricas, de fecha y categóricas no se tocan: pasarlas a tipos
+    Arrow cambiaría los enteros con nulos (hoy float) y el texto publicado en el DW.
+    
+    Args:
+        data (dict): Diccionario con los DataFrames de datos crudos (se modifica).
+    """
+    for table, df in data.items():
+        text_cols = [col for col in df.columns
+                     if df[col].dtype == object and pd.api.types.infer_dtype(df[col], skipna=True) == 'string']
+        if text_cols:
+            data[table] = df.astype({col: 'string[pyarrow]' for col in text_cols})
+
+def _is_dense_calendar(calendar_days, calendar_ids):
+    """
+    Indica si dim_calendar es un rango diario continuo y ordenado cuyo 'id' es la
+    posición + 1 (la forma en que la construye create_dim_calendar).
+    """
+    n = len(calendar_days)
+    return (
+        (calendar_days[-1] - calendar_days[0]).astype(np.int64) == n - 1
+        and (np.diff(calendar_days).astype(np.int64) == 1).all()
+        and (calendar_ids == np.arange(1, n + 1)).all()
+    )
+
 def _get_date_id(date_series, dim_calendar):
     """
     Función auxiliar para buscar la Surrogate Key (SK) de la dimensión de calendario
     basado en una serie de fechas (timestamps).
     
-    Aplica un LEFT JOIN entre la serie de fechas y dim_calendar para obtener el 'id' (SK).
+    Si dim_calendar es un rango diario continuo y ordenado cuyo 'id' es la posición + 1,
+    la SK se calcula con aritmética de enteros: (fecha - fecha_mínima).días + 1,
+    sin construir ninguna tabla auxiliar ni realizar un JOIN. Si no (ej: un calendario
+    con huecos o SK no correlativas), se busca cada fecha en un diccionario {día: id}.
     
     Devuelve NaN si la fecha no se encuentra en el calendario.
     
     Args:
-        date_series (pd.Series): La serie de timestamps o fechas a mapear.
+        date_series (pd.Series): La serie datetime64 a mapear (ver _preparse_dates).
         dim_calendar (pd.DataFrame): La dimensión de calendario completa (ya creada).
         
     Returns:
         pd.Series: Una serie con las SK 'id' de dim_calendar, lista para ser una FK en la tabla de hechos.
+                   Es entera si todas las fechas se encuentran; si no, float con NaN.
     """
-    # Normaliza la fecha de entrada (elimina la hora para el join con dim_calendar)
-    dates = pd.to_datetime(date_series, errors='coerce').dt.normalize()
-    dates_df = pd.DataFrame({'date_lookup': dates})
-    
-    # --- MERGE (LEFT JOIN) ---
-    # Busca el 'id' (SK) en dim_calendar usando la fecha normalizada como clave.
-    merged = pd.merge(
-        dates_df,
-        dim_calendar[['date', 'id']],
-        left_on='date_lookup',
-        right_on='date',
-        how='left'
-    )
-    return merged['id']
+    # Normaliza la fecha de entrada a días (elimina la hora)
+    dates = date_series.to_numpy().astype('datetime64[D]')
+    
+    if dim_calendar.empty:
+        return pd.Series(np.nan, index=date_series.index)
+    
+    calendar_days = dim_calendar['date'].to_numpy().astype('datetime64[D]')
+    calendar_ids = dim_calendar['id'].to_numpy()
+    
+    if not _is_dense_calendar(calendar_days, calendar_ids):
+        # --- SK por búsqueda en diccionario (día como int64 -> id) ---
+        lookup = dict(zip(calendar_days.view(np.int64).tolist(), calendar_ids.tolist()))
+        return pd.Series(dates.view(np.int64), index=date_series.index).map(lookup)
+    
+    min_date, max_date = calendar_days[0], calendar_days[-1]
+    
+    # --- SK por diferencia de días ---
+    ids = ((dates - min_date).astype(np.int64) + 1).astype(np.int32)
+    found = ~np.isnat(dates) & (dates >= min_date) & (dates <= max_date)
+    if found.all():
+        return pd.Series(ids, index=date_series.index)
+    return pd.Series(np.where(found, ids, np.nan), index=date_series.index)
+
+def _na_int(series, dtype=np.int64):
+    """
+    Función auxiliar que convierte una clave (float con NaN o entera) a un arreglo
+    entero con -1 en lugar de los nulos, en una sola pasada (sin fillna + astype).
+    
+    Args:
+        series (pd.Series): La columna de claves.
+        dtype: Tipo entero de destino (por defecto np.int64).
+        
+    Returns:
+        np.ndarray: Las claves como enteros, con -1 para "Desconocido/N/A".
+    """
+    return series.to_numpy(dtype=dtype, na_value=-1)
+
+def _downcast_keys(df, cols):
+    """
+    Función auxiliar que limpia claves (FK/NK) de una tabla de hechos: rellena los
+    nulos con -1 ("Desconocido/N/A") y las convierte a entero.
+    
+    Las claves naturales provienen de los datos crudos y no tienen un rango
+    acotado: se pasan a int32 solo si todos sus valores entran en ese tipo
+    (reduce a la mitad los bytes movidos por los joins y la escritura) y, si no,
+    se mantienen en int64. El CSV resultante es idéntico en ambos casos.
+    
+    Args:
+        df (pd.DataFrame): La tabla de hechos (se modifica).
+        cols (list): Columnas de claves a limpiar.
+    """
+    int32_info = np.iinfo(np.int32)
+    for col in cols:
+        values = _na_int(df[col])
+        if len(values) and int32_info.min <= values.min() and values.max() <= int32_info.max:
+            values = values.astype(np.int32)
+        df[col] = values
+
+def _add_surrogate_key(df, key_col):
+    """
+    Función auxiliar que crea la Surrogate Key (SK) 'id' de una dimensión, densa
+    y según el orden de la Clave Natural (NK).
+    
+    La NK se factoriza una única vez (pd.factorize con sort=True) a códigos enteros:
+    si los códigos ya son crecientes (las fuentes suelen venir ordenadas por su clave)
+    no se reordena nada; si no, se reordenan las filas con un argsort sobre los
+    códigos en lugar de ordenar el DataFrame completo por la NK. Las NK nulas
+    quedan al final, igual que con sort_values.
+    
+    Args:
+        df (pd.DataFrame): La dimensión (sin 'id').
+        key_col (str): Nombre de la Clave Natural.
+        
+    Returns:
+        pd.DataFrame: La dimensión ordenada por NK con la columna 'id' (int32) como primera columna.
+    """
+    codes, uniques = pd.factorize(df[key_col], sort=True)
+    codes[codes < 0] = len(uniques)
+    if len(codes) > 1 and not (np.diff(codes) > 0).all():
+        df = df.take(np.argsort(codes, kind='stable'))
+    df = df.reset_index(drop=True)
+    df.insert(0, 'id', np.arange(1, len(df) + 1, dtype=np.int32))
+    return df
+
+def _denormalize_by_position(df, lookup, key):
+    """
+    Función auxiliar que realiza un LEFT JOIN muchos-a-uno de 'df' contra 'lookup'
+    por la columna 'key' sin pd.merge: se calcula una única vez la posición de cada
+    clave de 'df' en 'lookup' (Index.get_indexer) y cada columna se trae con un
+    fancy-index sobre su arreglo NumPy. Las claves sin correspondencia quedan nulas
+    (NaN / NaT), igual que en el JOIN.
+    
+    Si la clave de 'lookup' no es única, se usa un join sobre el índice.
+    
+    Args:
+        df (pd.DataFrame): La tabla de la izquierda (ej: los ítems).
+        lookup (pd.DataFrame): La tabla de la derecha, con 'key' y las columnas a traer.
+        key (str): Nombre de la columna de unión (presente en ambas tablas).
+        
+    Returns:
+        pd.DataFrame: 'df' con las columnas de 'lookup' (salvo 'key') agregadas.
+    """
+    lookup_keys = pd.Index(lookup[key])
+    if not lookup_keys.is_unique:
+        return df.join(lookup.set_index(key), on=key, how='left')
+    
+    positions = lookup_keys.get_indexer(df[key])
+    df = df.copy(deep=False)
+    for col in lookup.columns.drop(key):
+        df[col] = pd.api.extensions.take(lookup[col].to_numpy(), positions, allow_fill=True)
+    return df
+
+def _categoricalize(df, cols):
+    """
+    Función auxiliar que convierte a 'category' los atributos de texto de baja
+    cardinalidad (status, códigos, nombres de día/mes, etc.).
+    
+    Las columnas que ya son categóricas (ej: tipadas en la extracción) se dejan
+    tal cual. El CSV resultante es idéntico.
+    
+    Args:
+        df (pd.DataFrame): La tabla a convertir (se modifica).
+        cols (list): Columnas a convertir.
+    """
+    for col in cols:
+        if not isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].astype('category')
+
+def _days_between(start_series, end_series):
+    """
+    Función auxiliar que calcula la cantidad de días completos entre dos series
+    de fechas (equivalente a (fin - inicio).dt.days), en una sola pasada sobre
+    los buffers int64 de datetime64, sin construir una Serie de timedelta.
+    
+    Args:
+        start_series (pd.Series): Fecha de inicio (datetime64).
+        end_series (pd.Series): Fecha de fin (datetime64).
+        
+    Returns:
+        pd.Series: Días entre ambas fechas (redondeo hacia abajo, como Timedelta.days).
+                   Es entera si no hay fechas nulas; si no, float con NaN.
+    """
+    delta = end_series.to_numpy() - start_series.to_numpy()
+    unit, count = np.datetime_data(delta.dtype)
+    ticks_per_day = np.timedelta64(1, 'D') // np.timedelta64(count, unit)
+    missing = np.isnat(delta)
+    
+    # La división se hace en el mismo buffer de la diferencia (sin arreglos intermedios)
+    days = delta.view(np.int64)
+    np.floor_divide(days, ticks_per_day, out=days)
+    if missing.any():
+        days = days.astype(np.float64)
+        days[missing] = np.nan
+    return pd.Series(days, index=start_series.index)
+
+SECONDS_PER_DAY = 86_400
+
+@functools.lru_cache(maxsize=1)
+def _time_labels():
+    """
+    Tabla de las 86.400 etiquetas 'HH:MM:SS' de un día, indexada por segundo del día.
+    Se construye una sola vez y queda en caché.
+    """
+    labels = [f"{h:02d}:{m:02d}:{s:02d}" for h in range(24) for m in range(60) for s in range(60)]
+    return pd.array(labels, dtype='string[pyarrow]')
 
 def _get_time(date_series):
     """
     Función auxiliar para extraer el componente de tiempo (HH:MM:SS) de una serie de fechas/timestamps.
     
+    Se calcula el segundo del día con aritmética de enteros sobre el buffer datetime64
+    y se toma la etiqueta correspondiente de una tabla precalculada (sin strftime).
+    
     Rellena los valores Nulos (NaN) con '00:00:00'.
     
     Args:
-        date_series (pd.Series): La serie de timestamps.
+        date_series (pd.Series): La serie datetime64 (ver _preparse_dates).
         
     Returns:
         pd.Series: Una serie de strings con el formato de hora 'HH:MM:SS'.
     """
-    times = pd.to_datetime(date_series, errors='coerce')
-    return times.dt.strftime('%H:%M:%S').fillna('00:00:00')
+    values = date_series.to_numpy().astype('datetime64[s]')
+    seconds_of_day = values.view(np.int64) % SECONDS_PER_DAY
+    seconds_of_day[np.isnat(values)] = 0
+    return pd.Series(_time_labels().take(seconds_of_day), index=date_series.index)
 
 
 # --- Funciones de Creación de Dimensiones ---
 
+# Tablas de nombres para los atributos de dim_calendar (índice 0 = lunes / enero)
+DAY_NAMES = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+MONTH_NAMES = ['January', 'February', 'March', 'April', 'May', 'June', 'July',
+               'August', 'September', 'October', 'November', 'December']
+
 def create_dim_calendar(data):
     """
     Crea la Dimensión de Calendario (dim_calendar) DINÁMICAMENTE.
@@ -72,52 +344,64 @@ def create_dim_calendar(data):
     """
     print("  -> Iniciando la creación de dim_calendar (Dinámica)...")
     
-    # 1. Recolectar y consolidar todas las fechas relevantes de las tablas de hechos y dimensiones
-    all_dates = pd.concat([
-        pd.to_datetime(data['sales_order']['order_date'], errors='coerce'),
-        pd.to_datetime(data['web_session']['started_at'], errors='coerce'),
-        pd.to_datetime(data['nps_response']['responded_at'], errors='coerce'),
-        pd.to_datetime(data['payment']['paid_at'], errors='coerce'),
-        pd.to_datetime(data['shipment']['shipped_at'], errors='coerce'),
-        pd.to_datetime(data['shipment']['delivered_at'], errors='coerce'),
-        pd.to_datetime(data['customer']['created_at'], errors='coerce'),
-        pd.to_datetime(data['address']['created_at'], errors='coerce'),
-        pd.to_datetime(data['product']['created_at'], errors='coerce'),
-    ]).dropna()
-    
-    all_dates_normalized = all_dates.dt.normalize()
-
-    if all_dates_normalized.empty:
+    # 1. Recorrer todas las fechas relevantes de las tablas de hechos y dimensiones
+    # acumulando el mínimo y el máximo (en días) sin concatenarlas en una sola Serie.
+    # Las fechas se parsean localmente (sin modificar 'data'); las de eventos ya vienen
+    # parseadas por _preparse_dates cuando la función se invoca desde transform_all_data.
+    min_day, max_day = None, None
+    for table, col in CALENDAR_DATE_COLUMNS:
+        dates = _parse_dates(data[table][col])
+        days = dates.to_numpy().astype('datetime64[D]').view(np.int64)
+        days = days[days != np.iinfo(np.int64).min]      # descartar NaT
+        if days.size:
+            min_day = days.min() if min_day is None else min(min_day, days.min())
+            max_day = days.max() if max_day is None else max(max_day, days.max())
+
+    if min_day is None:
         print("  Advertencia: No se encontraron fechas válidas para construir dim_calendar. Se devuelve un DF vacío.")
         # Devuelve un DataFrame vacío con la estructura esperada
         return pd.DataFrame(columns=['id', 'date', 'day', 'month', 'year', 'day_name', 'month_name', 'quarter', 'week_number', 'year_month', 'is_weekend'])
 
     # 2. Determinar el rango dinámico (mínima a máxima fecha) y generar el rango diario
-    min_date = all_dates_normalized.min()
-    max_date = all_dates_normalized.max()
+    min_date = pd.Timestamp(np.datetime64(int(min_day), 'D'))
+    max_date = pd.Timestamp(np.datetime64(int(max_day), 'D'))
     print(f"  Rango de fechas detectado: {min_date.strftime('%Y-%m-%d')} a {max_date.strftime('%Y-%m-%d')}")
     
     date_range = pd.date_range(start=min_date, end=max_date, freq='D')
-    df_calendar = pd.DataFrame(date_range, columns=['date'])
     
     # 3. Enriquecer con atributos de fecha (Jerarquía temporal)
-    df_calendar['day'] = df_calendar['date'].dt.day
-    df_calendar['month'] = df_calendar['date'].dt.month
-    df_calendar['year'] = df_calendar['date'].dt.year
-    df_calendar['day_name'] = df_calendar['date'].dt.day_name()
-    df_calendar['month_name'] = df_calendar['date'].dt.month_name()
-    df_calendar['quarter'] = df_calendar['date'].dt.quarter
-    df_calendar['week_number'] = df_calendar['date'].dt.isocalendar().week.astype(int)
-    df_calendar['year_month'] = df_calendar['date'].dt.strftime('%Y-%m')
-    df_calendar['is_weekend'] = df_calendar['day_name'].isin(['Saturday', 'Sunday'])
-    
-    # 4. Crear Surrogate Key (SK) - Clave Sustituta
-    df_calendar.reset_index(drop=True, inplace=True)
-    df_calendar['id'] = df_calendar.index + 1
-    
-    # 5. Ordenar las columnas para el estándar dimensional (SK, NK, Atributos)
-    cols = ['id'] + [col for col in df_calendar if col != 'id']
-    df_calendar = df_calendar[cols]
+    # Todo se deriva con aritmética de enteros sobre datetime64[D] y tablas de nombres
+    # (sin accessors .dt ni strftime por fila).
+    days = date_range.values.astype('datetime64[D]')
+    months = days.astype('datetime64[M]')
+    month_ordinal = months.astype(np.int64)              # meses desde 1970-01
+    month = (month_ordinal % 12 + 1).astype(np.int32)
+    year = (month_ordinal // 12 + 1970).astype(np.int32)
+    day = ((days - months).astype(np.int64) + 1).astype(np.int32)
+    dow = (days.astype(np.int64) + 3) % 7                 # 1970-01-01 fue jueves (0 = lunes)
+    
+    # Semana ISO: la semana pertenece al año de su jueves
+    thursday = days + (3 - dow).astype('timedelta64[D]')
+    week_number = (thursday - thursday.astype('datetime64[Y]').astype('datetime64[D]')).astype(np.int64) // 7 + 1
+    
+    first_month = month_ordinal[0]
+    year_month_labels = [f"{m // 12 + 1970:04d}-{m % 12 + 1:02d}" for m in range(first_month, month_ordinal[-1] + 1)]
+    
+    df_calendar = pd.DataFrame({
+        'date': date_range,
+        'day': day,
+        'month': month,
+        'year': year,
+        'day_name': pd.Categorical.from_codes(dow, categories=DAY_NAMES),
+        'month_name': pd.Categorical.from_codes(month - 1, categories=MONTH_NAMES),
+        'quarter': (month - 1) // 3 + 1,
+        'week_number': week_number.astype(np.int32),
+        'year_month': pd.Categorical.from_codes(month_ordinal - first_month, categories=year_month_labels),
+        'is_weekend': dow >= 5,
+    })
+    
+    # 4. Crear Surrogate Key (SK) - Clave Sustituta, como primera columna (SK, NK, Atributos)
+    df_calendar.insert(0, 'id', np.arange(1, len(df_calendar) + 1, dtype=np.int32))
     
     print("  -> dim_calendar creada exitosamente.")
     return df_calendar
@@ -135,22 +419,17 @@ def create_dim_customer(data):
         - Atributos del cliente.
     """
     print("  -> Creando dim_customer...")
-    df = data['customer'].copy()
+    df = data['customer']
     
     # 1. Renombrar la Clave Natural (NK)
     df = df.rename(columns={'customer_id': 'customer_key'})
     
     # 2. Seleccionar columnas relevantes para la dimensión
     df = df[['customer_key', 'email', 'first_name', 'last_name', 'phone', 'status', 'created_at']]
+    _categoricalize(df, ['status'])
     
-    # 3. Crear Surrogate Key (SK) - Basada en la posición ordenada
-    df = df.sort_values(by='customer_key')
-    df.reset_index(drop=True, inplace=True)
-    df['id'] = df.index + 1
-    
-    # 4. Ordenar las columnas (SK, NK, Atributos)
-    cols = ['id', 'customer_key'] + [col for col in df if col not in ['id', 'customer_key']]
-    df = df[cols]
+    # 3. Crear Surrogate Key (SK) - Basada en el orden de la NK (queda como primera columna: SK, NK, Atributos)
+    df = _add_surrogate_key(df, 'customer_key')
     
     print("  -> dim_customer creada.")
     return df
@@ -168,19 +447,16 @@ def create_dim_channel(data):
         - Atributos del canal.
     """
     print("  -> Creando dim_channel...")
-    df = data['channel'].copy()
+    df = data['channel']
     
     # 1. Renombrar la Clave Natural (NK)
     df = df.rename(columns={'channel_id': 'channel_key'})
     
-    # 2. Crear Surrogate Key (SK)
-    df = df.sort_values(by='channel_key')
-    df.reset_index(drop=True, inplace=True)
-    df['id'] = df.index + 1
+    # 2. Seleccionar columnas (NK, Atributos)
+    df = df[['channel_key', 'code', 'name']]
     
-    # 3. Ordenar y seleccionar columnas (SK, NK, Atributos)
-    cols = ['id', 'channel_key', 'code', 'name']
-    df = df[cols]
+    # 3. Crear Surrogate Key (SK), como primera columna
+    df = _add_surrogate_key(df, 'channel_key')
     
     print("  -> dim_channel creada.")
     return df
@@ -201,32 +477,28 @@ def create_dim_address(data):
         - Atributos de la dirección.
     """
     print("  -> Creando dim_address (Desnormalizando provincia)...")
-    address = data['address'].copy()
-    province = data['province'].copy()
+    address = data['address']
+    province = data['province']
     
-    # --- MERGE (LEFT JOIN) ---
-    # Enriquecer la dirección con los detalles de la provincia.
-    df = pd.merge(address, province, on='province_id', how='left')
-    
-    # 1. Renombrar claves y columnas desnormalizadas
-    df = df.rename(columns={
-        'address_id': 'address_key',
+    # --- JOIN (LEFT) ---
+    # Enriquecer la dirección con los detalles de la provincia
+    # (búsqueda sobre el índice único 'province_id').
+    province_idx = province.set_index('province_id').rename(columns={
         'name': 'province_name',
         'code': 'province_code'
     })
+    df = address.join(province_idx, on='province_id', how='left')
+    
+    # 1. Renombrar la Clave Natural (NK)
+    df = df.rename(columns={'address_id': 'address_key'})
     
     # 2. Seleccionar atributos finales para la dimensión
     df = df[['address_key', 'line1', 'line2', 'city', 'province_name', 
              'province_code', 'postal_code', 'country_code', 'created_at']]
+    _categoricalize(df, ['province_code', 'country_code'])
 
-    # 3. Crear Surrogate Key (SK)
-    df = df.sort_values(by='address_key')
-    df.reset_index(drop=True, inplace=True)
-    df['id'] = df.index + 1
-    
-    # 4. Ordenar las columnas (SK, NK, Atributos)
-    cols = ['id', 'address_key'] + [col for col in df if col not in ['id', 'address_key']]
-    df = df[cols]
+    # 3. Crear Surrogate Key (SK) (queda como primera columna: SK, NK, Atributos)
+    df = _add_surrogate_key(df, 'address_key')
     
     print("  -> dim_address creada.")
     return df
@@ -247,45 +519,35 @@ def create_dim_product(data):
         - Atributos del producto y su jerarquía.
     """
     print("  -> Creando dim_product (Desnormalizando categorías)...")
-    product = data['product'].copy()
-    category = data['product_category'].copy()
+    product = data['product']
+    category = data['product_category']
 
     # 1. Asegurar tipos de datos de claves para un join correcto
-    product['category_id'] = product['category_id'].astype(str)
-    category['category_id'] = category['category_id'].astype(str)
-    category['parent_id'] = category['parent_id'].astype(str)
+    # (con assign: se crean frames nuevos y los datos crudos no se modifican)
+    product = product.assign(category_id=product['category_id'].astype('string[pyarrow]'))
+    category = category.assign(
+        category_id=category['category_id'].astype('string[pyarrow]'),
+        parent_id=category['parent_id'].astype('string[pyarrow]'),
+    )
     
     # 2. Preparar categorías padre para el self-join
-    parent_cats = category[['category_id', 'name']].rename(
-        columns={'category_id': 'parent_id', 'name': 'parent_category_name'}
+    parent_idx = category.set_index('category_id')[['name']].rename(
+        columns={'name': 'parent_category_name'}
     )
     
-    # --- MERGE 1 (Self-Join) ---
+    # --- JOIN 1 (Self-Join) ---
     # Enriquecer categorías con el nombre de su padre.
-    categories_enriched = pd.merge(
-        category,
-        parent_cats,
-        on='parent_id',
-        how='left',
-        suffixes=('_cat', '_parent')
-    )
+    categories_enriched = category.join(parent_idx, on='parent_id', how='left')
 
-    # --- MERGE 2 ---
+    # --- JOIN 2 ---
     # Unir la tabla de productos con las categorías ya enriquecidas.
-    df = pd.merge(
-        product,
-        categories_enriched,
-        on='category_id',
-        how='left',
-        suffixes=('_prod', '') 
+    categories_idx = categories_enriched.set_index('category_id')[['name', 'parent_category_name']].rename(
+        columns={'name': 'category_name'}   # Nombre de la categoría
     )
+    df = product.join(categories_idx, on='category_id', how='left')
     
-    # 3. Renombrar claves y resolver ambigüedades de nombres
-    df = df.rename(columns={
-        'product_id': 'product_key',
-        'name_prod': 'name',      # Nombre del producto
-        'name': 'category_name'   # Nombre de la categoría
-    })
+    # 3. Renombrar la Clave Natural (NK)
+    df = df.rename(columns={'product_id': 'product_key'})
     
     # 4. Seleccionar atributos y limpiar valores nulos de jerarquía
     df = df[['product_key', 'sku', 'name', 'list_price', 'status', 
@@ -293,15 +555,10 @@ def create_dim_product(data):
     
     df['category_name'] = df['category_name'].fillna('Sin Categoría')
     df['parent_category_name'] = df['parent_category_name'].fillna('Sin Categoría')
+    _categoricalize(df, ['status'])
 
-    # 5. Crear la Surrogate Key (SK)
-    df = df.sort_values(by='product_key')
-    df.reset_index(drop=True, inplace=True)
-    df['id'] = df.index + 1
-
-    # 6. Reordenar columnas (SK, NK, Atributos)
-    cols = ['id', 'product_key'] + [col for col in df if col not in ['id', 'product_key']]
-    df = df[cols]
+    # 5. Crear la Surrogate Key (SK) (queda como primera columna: SK, NK, Atributos)
+    df = _add_surrogate_key(df, 'product_key')
 
     print("  -> dim_product creada.")
     return df
@@ -323,39 +580,35 @@ def create_dim_store(data):
         - Atributos de la tienda, dirección y provincia.
     """
     print("  -> Creando dim_store (Desnormalizando dirección y provincia)...")
-    store = data['store'].copy()
-    address = data['address'].copy()
-    province = data['province'].copy()
+    store = data['store']
+    address = data['address']
+    province = data['province']
     
-    # --- MERGE 1 ---
+    # --- JOIN 1 ---
     # Unir la tabla de tiendas con la tabla de direcciones.
-    store_addr = pd.merge(store, address, on='address_id', how='left')
+    store_addr = store.join(address.set_index('address_id'), on='address_id', how='left')
     
-    # --- MERGE 2 ---
+    # --- JOIN 2 ---
     # Unir el resultado con la tabla de provincias.
-    df = pd.merge(store_addr, province, on='province_id', how='left')
+    province_idx = province.set_index('province_id').rename(columns={
+        'name': 'province_name',
+        'code': 'province_code'
+    })
+    df = store_addr.join(province_idx, on='province_id', how='left')
     
-    # 1. Renombrar claves y resolver ambigüedades de nombres
+    # 1. Renombrar claves
     df = df.rename(columns={
         'store_id': 'store_key',
-        'name_x': 'name',         # Nombre de la tienda
-        'line1': 'line',          # Renombrar 'line1' a 'line'
-        'name_y': 'province_name',
-        'code': 'province_code'
+        'line1': 'line'           # Renombrar 'line1' a 'line'
     })
     
     # 2. Seleccionar atributos finales (excluyendo 'line2' de la dirección)
     df = df[['store_key', 'name', 'line', 'city', 'province_name', 
              'province_code', 'postal_code', 'country_code', 'created_at']]
+    _categoricalize(df, ['province_code', 'country_code'])
 
-    # 3. Crear Surrogate Key (SK)
-    df = df.sort_values(by='store_key')
-    df.reset_index(drop=True, inplace=True)
-    df['id'] = df.index + 1
-    
-    # 4. Ordenar las columnas (SK, NK, Atributos)
-    cols = ['id', 'store_key'] + [col for col in df if col not in ['id', 'store_key']]
-    df = df[cols]
+    # 3. Crear Surrogate Key (SK) (queda como primera columna: SK, NK, Atributos)
+    df = _add_surrogate_key(df, 'store_key')
     
     print("  -> dim_store creada.")
     return df
@@ -378,7 +631,12 @@ def create_fact_sales_order(data, dim_calendar):
         - Métricas/Medidas (subtotal, tax_amount, total_amount)
     """
     print("  -> Creando fact_sales_order...")
-    df = data['sales_order'].copy()
+    # Proyectar solo las columnas que usa la tabla de hechos antes de copiar
+    df = data['sales_order'][[
+        'order_id', 'customer_id', 'channel_id', 'store_id', 'order_date',
+        'billing_address_id', 'shipping_address_id', 'status', 'currency_code',
+        'subtotal', 'tax_amount', 'shipping_fee', 'total_amount'
+    ]].copy()
         
     # 1. Renombrar la Clave Natural (NK) y columnas de interés
     df = df.rename(columns={'order_id': 'id', 'status': 'status_order'})
@@ -388,9 +646,8 @@ def create_fact_sales_order(data, dim_calendar):
     df['order_time'] = _get_time(df['order_date'])
     
     # 3. Limpiar claves naturales (establecer -1 para "Desconocido/N/A")
-    df['store_id'] = df['store_id'].fillna(-1).astype(int)
-    df['billing_address_id'] = df['billing_address_id'].fillna(-1).astype(int)
-    df['shipping_address_id'] = df['shipping_address_id'].fillna(-1).astype(int)
+    _downcast_keys(df, ['store_id', 'billing_address_id', 'shipping_address_id'])
+    _categoricalize(df, ['status_order', 'currency_code'])
 
     # 4. Seleccionar y ordenar columnas finales
     cols = [
@@ -420,13 +677,16 @@ def create_fact_sales_order_item(data, dim_calendar):
         - Métricas/Medidas (quantity, unit_price, line_total)
     """
     print("  -> Creando fact_sales_order_item...")
-    items = data['sales_order_item'].copy()
+    items = data['sales_order_item'][[
+        'order_item_id', 'order_id', 'product_id', 'quantity', 'unit_price',
+        'discount_amount', 'line_total'
+    ]].copy()
     # Seleccionar solo las claves necesarias de la cabecera
     orders = data['sales_order'][['order_id', 'customer_id', 'channel_id', 'store_id', 'order_date']]
     
-    # --- MERGE (LEFT JOIN) ---
+    # --- LOOKUP POR POSICIÓN (LEFT JOIN) sobre 'order_id' ---
     # Denormalizar los ítems con las claves de la cabecera de la orden
-    df = pd.merge(items, orders, on='order_id', how='left')
+    df = _denormalize_by_position(items, orders, 'order_id')
     
     # 1. Renombrar la Clave Natural (NK)
     df = df.rename(columns={'order_item_id': 'id'})
@@ -435,10 +695,7 @@ def create_fact_sales_order_item(data, dim_calendar):
     df['order_date_id'] = _get_date_id(df['order_date'], dim_calendar)
     
     # 3. Limpiar claves naturales (establecer -1 para "Desconocido/N/A")
-    df['store_id'] = df['store_id'].fillna(-1).astype(int)
-    df['customer_id'] = df['customer_id'].fillna(-1).astype(int)
-    df['channel_id'] = df['channel_id'].fillna(-1).astype(int)
-    df['product_id'] = df['product_id'].fillna(-1).astype(int)
+    _downcast_keys(df, ['store_id', 'customer_id', 'channel_id', 'product_id'])
 
     # 4. Seleccionar y ordenar columnas finales
     cols = [
@@ -467,13 +724,15 @@ def create_fact_payment(data, dim_calendar):
         - Métricas/Medidas (amount)
     """
     print("  -> Creando fact_payment...")
-    payments = data['payment'].copy()
+    payments = data['payment'][[
+        'payment_id', 'order_id', 'method', 'status', 'amount', 'paid_at', 'transaction_ref'
+    ]].copy()
     # Seleccionar solo las claves necesarias de la cabecera
-    orders = data['sales_order'][['order_id', 'customer_id', 'billing_address_id', 'channel_id', 'store_id']]
+    orders = data['sales_order'].set_index('order_id')[['customer_id', 'billing_address_id', 'channel_id', 'store_id']]
     
-    # --- MERGE (LEFT JOIN) ---
+    # --- JOIN (LEFT) sobre el índice único 'order_id' ---
     # Denormalizar los pagos con las claves de la cabecera de la orden.
-    df = pd.merge(payments, orders, on='order_id', how='left')
+    df = payments.join(orders, on='order_id', how='left')
     
     # 1. Renombrar la Clave Natural (NK) y columnas de interés
     df = df.rename(columns={'payment_id': 'id', 'status': 'status_payment'})
@@ -483,10 +742,8 @@ def create_fact_payment(data, dim_calendar):
     df['paid_at_time'] = _get_time(df['paid_at'])
     
     # 3. Limpiar claves naturales (establecer -1 para "Desconocido/N/A")
-    df['store_id'] = df['store_id'].fillna(-1).astype(int)
-    df['customer_id'] = df['customer_id'].fillna(-1).astype(int)
-    df['channel_id'] = df['channel_id'].fillna(-1).astype(int)
-    df['billing_address_id'] = df['billing_address_id'].fillna(-1).astype(int)
+    _downcast_keys(df, ['store_id', 'customer_id', 'channel_id', 'billing_address_id'])
+    _categoricalize(df, ['method', 'status_payment'])
 
     # 4. Seleccionar y ordenar columnas finales
     cols = [
@@ -516,38 +773,36 @@ def create_fact_shipment(data, dim_calendar):
         - Métrica/Medida (dias_de_entrega)
     """
     print("  -> Creando fact_shipment...")
-    shipments = data['shipment'].copy()
+    shipments = data['shipment'][[
+        'shipment_id', 'order_id', 'carrier', 'tracking_number', 'shipped_at', 'delivered_at'
+    ]].copy()
     # Seleccionar solo las claves necesarias de la cabecera
-    orders = data['sales_order'][['order_id', 'customer_id', 'shipping_address_id', 'channel_id']]
+    orders = data['sales_order'].set_index('order_id')[['customer_id', 'shipping_address_id', 'channel_id']]
     
-    # --- MERGE (LEFT JOIN) ---
+    # --- JOIN (LEFT) sobre el índice único 'order_id' ---
     # Denormalizar los envíos con las claves de la cabecera de la orden.
-    df = pd.merge(shipments, orders, on='order_id', how='left')
+    df = shipments.join(orders, on='order_id', how='left')
     
     # 1. Renombrar la Clave Natural (NK)
     df = df.rename(columns={'shipment_id': 'id'})
     
-    # 2. Convertir a datetime ANTES de calcular métricas o buscar FKs
-    df['shipped_at'] = pd.to_datetime(df['shipped_at'], errors='coerce')
-    df['delivered_at'] = pd.to_datetime(df['delivered_at'], errors='coerce')
-
-    # 3. Buscar Foreign Keys (FKs) de dim_calendar
+    # 2. Buscar Foreign Keys (FKs) de dim_calendar
+    # (shipped_at / delivered_at ya son datetime64, ver _preparse_dates)
     df['shipped_at_date_id'] = _get_date_id(df['shipped_at'], dim_calendar)
     df['delivered_at_date_id'] = _get_date_id(df['delivered_at'], dim_calendar)
     
-    # 4. Extraer tiempos
+    # 3. Extraer tiempos
     df['shipped_at_time'] = _get_time(df['shipped_at'])
     df['delivered_at_time'] = _get_time(df['delivered_at'])
 
-    # 5. Calcular métricas: Diferencia en días entre envío y entrega
-    df['dias_de_entrega'] = (df['delivered_at'] - df['shipped_at']).dt.days
+    # 4. Calcular métricas: Diferencia en días entre envío y entrega
+    df['dias_de_entrega'] = _days_between(df['shipped_at'], df['delivered_at'])
 
-    # 6. Limpiar claves naturales (establecer -1 para "Desconocido/N/A")
-    df['customer_id'] = df['customer_id'].fillna(-1).astype(int)
-    df['channel_id'] = df['channel_id'].fillna(-1).astype(int)
-    df['shipping_address_id'] = df['shipping_address_id'].fillna(-1).astype(int)
+    # 5. Limpiar claves naturales (establecer -1 para "Desconocido/N/A")
+    _downcast_keys(df, ['customer_id', 'channel_id', 'shipping_address_id'])
+    _categoricalize(df, ['carrier'])
 
-    # 7. Seleccionar y ordenar columnas finales
+    # 6. Seleccionar y ordenar columnas finales
     cols = [
         'id', 'customer_id', 'shipping_address_id', 'channel_id', 'carrier',
         'shipped_at_date_id', 'shipped_at_time',
@@ -573,7 +828,9 @@ def create_fact_web_session(data, dim_calendar):
         - Atributos (source, device)
     """
     print("  -> Creando fact_web_session...")
-    df = data['web_session'].copy()
+    df = data['web_session'][[
+        'session_id', 'customer_id', 'started_at', 'ended_at', 'source', 'device'
+    ]].copy()
     
     # 1. Renombrar la Clave Natural (NK)
     df = df.rename(columns={'session_id': 'id'})
@@ -587,7 +844,8 @@ def create_fact_web_session(data, dim_calendar):
     df['ended_at_time'] = _get_time(df['ended_at'])
     
     # 4. Limpiar claves naturales (establecer -1 para "Desconocido/N/A")
-    df['customer_id'] = df['customer_id'].fillna(-1).astype(int)
+    _downcast_keys(df, ['customer_id'])
+    _categoricalize(df, ['source', 'device'])
 
     # 5. Seleccionar y ordenar columnas finales
     cols = [
@@ -613,7 +871,9 @@ def create_fact_nps_response(data, dim_calendar):
         - Métrica/Medida (score)
     """
     print("  -> Creando fact_nps_response...")
-    df = data['nps_response'].copy()
+    df = data['nps_response'][[
+        'nps_id', 'customer_id', 'channel_id', 'responded_at', 'score'
+    ]].copy()
     
     # 1. Renombrar la Clave Natural (NK)
     df = df.rename(columns={'nps_id': 'id'})
@@ -623,8 +883,7 @@ def create_fact_nps_response(data, dim_calendar):
     df['responded_at_time'] = _get_time(df['responded_at'])
     
     # 3. Limpiar claves naturales (establecer -1 para "Desconocido/N/A")
-    df['customer_id'] = df['customer_id'].fillna(-1).astype(int)
-    df['channel_id'] = df['channel_id'].fillna(-1).astype(int)
+    _downcast_keys(df, ['customer_id', 'channel_id'])
 
     # 4. Seleccionar y ordenar columnas finales
     cols = [
@@ -636,6 +895,52 @@ def create_fact_nps_response(data, dim_calendar):
 
 # --- Función Orquestadora del Proceso de Transformación ---
 
+# Tablas del DW independientes entre sí: función de creación y tablas crudas que consume.
+# A cada proceso se le envían solo sus tablas crudas, no el diccionario completo.
+DIMENSION_BUILDERS = {
+    'dim_customer': (create_dim_customer, ['customer']),
+    'dim_product': (create_dim_product, ['product', 'product_category']),
+    'dim_channel': (create_dim_channel, ['channel']),
+    'dim_address': (create_dim_address, ['address', 'province']),
+    'dim_store': (create_dim_store, ['store', 'address', 'province']),
+}
+
+FACT_BUILDERS = {
+    'fact_sales_order': (create_fact_sales_order, ['sales_order']),
+    'fact_sales_order_item': (create_fact_sales_order_item, ['sales_order_item', 'sales_order']),
+    'fact_payment': (create_fact_payment, ['payment', 'sales_order']),
+    'fact_shipment': (create_fact_shipment, ['shipment', 'sales_order']),
+    'fact_web_session': (create_fact_web_session, ['web_session']),
+    'fact_nps_response': (create_fact_nps_response, ['nps_response']),
+}
+
+def _run_builders(builders, data, *args, parallel=False):
+    """
+    Función auxiliar que ejecuta un grupo de funciones de creación independientes,
+    en serie o en paralelo (ProcessPoolExecutor, un proceso por tabla).
+    
+    Args:
+        builders (dict): {nombre_tabla: (función, [tablas crudas consumidas])}.
+        data (dict): Diccionario con los DataFrames de datos crudos.
+        *args: Argumentos adicionales para cada función (ej: dim_calendar).
+        parallel (bool): Si es True, cada tabla se construye en un proceso propio.
+        
+    Returns:
+        dict: {nombre_tabla: DataFrame}, en el mismo orden que 'builders'.
+    """
+    max_workers = min(len(builders), os.cpu_count() or 1)
+    if not parallel or max_workers <= 1:
+        return {name: builder(data, *args) for name, (builder, _) in builders.items()}
+    
+    # 'spawn' evita heredar por fork el estado del proceso padre (hilos, memoria)
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=max_workers, mp_context=context) as executor:
+        futures = {
+            name: executor.submit(builder, {table: data[table] for table in sources}, *args)
+            for name, (builder, sources) in builders.items()
+        }
+        return {name: future.result() for name, future in futures.items()}
+
 def transform_all_data(data):
     """
     Orquesta la creación de todas las Dimensiones y Tablas de Hechos del Data Warehouse.
@@ -648,6 +953,7 @@ def transform_all_data(data):
         data (dict): Un diccionario donde cada clave es el nombre
                      de una tabla cruda (ej: 'customer') y el valor
                      es un DataFrame de pandas con esos datos.
+                     Ni el diccionario ni sus DataFrames se modifican.
                      
     Returns:
         dict: Un diccionario con los DataFrames transformados del DW.
@@ -661,18 +967,23 @@ def transform_all_data(data):
     
     dw_tables = {}
     
+    # Texto en Arrow y fechas de eventos parseadas una sola vez, reutilizados en todas las tablas.
+    # Se trabaja sobre una copia del diccionario: los DataFrames del llamador no se modifican.
+    data = dict(data)
+    _to_arrow_strings(data)
+    _preparse_dates(data)
+    
     # --- Paso 1: Creación y Enriquecimiento de Dimensiones ---
     print("\n--- [FASE 1: DIMENSIONES] ---")
     
     # La dimensión de calendario es crucial y se crea primero, de forma dinámica.
     dw_tables['dim_calendar'] = create_dim_calendar(data=data)
     
+    # Con datos grandes, las tablas independientes se construyen en paralelo
+    parallel = PARALLEL and sum(len(df) for df in data.values()) >= PARALLEL_MIN_ROWS
+    
     # El resto de dimensiones (Cliente, Producto, etc.)
-    dw_tables['dim_customer'] = create_dim_customer(data)
-    dw_tables['dim_product'] = create_dim_product(data)
-    dw_tables['dim_channel'] = create_dim_channel(data)
-    dw_tables['dim_address'] = create_dim_address(data)
-    dw_tables['dim_store'] = create_dim_store(data)
+    dw_tables.update(_run_builders(DIMENSION_BUILDERS, data, parallel=parallel))
     
     # --- Paso 2: Creación y Enriquecimiento de Tablas de Hechos ---
     print("\n--- [FASE 2: TABLAS DE HECHOS] ---")
@@ -680,12 +991,7 @@ def transform_all_data(data):
     dim_calendar = dw_tables['dim_calendar'] 
     
     # Creación de Tablas de Hechos (transaccionales y de eventos)
-    dw_tables['fact_sales_order'] = create_fact_sales_order(data, dim_calendar)
-    dw_tables['fact_sales_order_item'] = create_fact_sales_order_item(data, dim_calendar)
-    dw_tables['fact_payment'] = create_fact_payment(data, dim_calendar)
-    dw_tables['fact_shipment'] = create_fact_shipment(data, dim_calendar)
-    dw_tables['fact_web_session'] = create_fact_web_session(data, dim_calendar)
-    dw_tables['fact_nps_response'] = create_fact_nps_response(data, dim_calendar)
+    dw_tables.update(_run_builders(FACT_BUILDERS, data, dim_calendar, parallel=parallel))
     
     print("\nProceso de Transformación (T) completado. Tablas DW generadas.")
     return dw_tables
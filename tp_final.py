@@ -1,10 +1,17 @@
+import argparse
+import logging
 import time
 from ETL.extract import extract_all_data
 from ETL.transform import transform_all_data
-from ETL.load import load_to_csv
+from ETL.load import load_many, DEFAULT_DW_FORMAT
 
-def main():
-    """Ejecuta el proceso ETL completo para el proyecto EcoBottle."""
+def main(file_format=DEFAULT_DW_FORMAT):
+    """
+    Ejecuta el proceso ETL completo para el proyecto EcoBottle.
+    
+    Args:
+        file_format (str): Formato de los archivos del DW ('csv', 'parquet' o 'feather').
+    """
     print("🚀 Iniciando proceso ETL - Proyecto EcoBottle\n")
 
     start_time = time.time()
@@ -33,12 +40,14 @@ def main():
         # Fase 3: Carga
         if success:
             print("[3/3] Cargando datos procesados en /DW...")
-            num_tables = 0
+            # Las tablas son independientes: con volumen suficiente se guardan en
+            # paralelo (un proceso por tabla); si no, en serie.
+            # load_to_csv enruta a Parquet/Feather según la extensión del archivo.
+            load_many(dw_tables, file_format=file_format)
+            num_tables = len(dw_tables)
 
-            for name, df in dw_tables.items():
-                load_to_csv(df, f"{name}.csv")
-                num_tables += 1
-                print(f"   - Archivo generado: {name}.csv")
+            for name in dw_tables:
+                print(f"   - Archivo generado: {name}.{file_format}")
 
             print("\n✅ Carga finalizada con éxito.")
             print(f"📂 Se generaron {num_tables} tablas en la carpeta /DW.\n")
@@ -53,4 +62,14 @@ def main():
         print(f"Detalle técnico: {e}")
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Proceso ETL del proyecto EcoBottle.")
+    parser.add_argument('--format', dest='file_format', choices=['csv', 'parquet', 'feather'],
+                        default=DEFAULT_DW_FORMAT,
+                        help="Formato de los archivos del DW (por defecto: DW_FORMAT o 'csv').")
+    parser.add_argument('--parquet', dest='file_format', action='store_const', const='parquet',
+                        help="Atajo de --format parquet (Parquet con compresión snappy).")
+    args = parser.parse_args()
+
+    # Los mensajes de extracción y carga se emiten por logging (nivel INFO)
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    main(args.file_format)